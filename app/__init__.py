@@ -1,10 +1,17 @@
 # Re-export top-level modules under the `app` package for backwards-compatible imports.
-# This file imports the existing top-level modules and exposes
-# them as attributes and submodules of the `app` package so
-# `from app.config import BASE_URL` will work without moving files.
+# This file exposes the existing top-level modules as attributes and
+# submodules of the `app` package so `from app.config import BASE_URL`
+# will work without moving files.
+#
+# Modules are resolved lazily on first use so that importing `app` does not
+# pull in chromadb, torch or sentence-transformers until something actually
+# needs them.
 
-import importlib
+import os
 import sys
+from importlib import import_module
+from importlib.abc import Loader, MetaPathFinder
+from importlib.machinery import ModuleSpec, PathFinder
 
 # List of modules we expose under app
 _MODULES = [
@@ -20,16 +27,61 @@ _MODULES = [
     "main",
 ]
 
-for _m in _MODULES:
+# top-level modules live next to this package
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _AliasLoader(Loader):
+    """Load `app.<m>` as the already-importable top-level module `<m>`."""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._target_spec = None
+
+    def create_module(self, spec):
+        module = import_module(self.target)
+        # the import machinery overwrites __spec__ with the alias spec after this
+        # returns; keep the real one so importlib.reload(<m>) still works
+        self._target_spec = module.__spec__
+        return module
+
+    def exec_module(self, module):
+        # the top-level import already executed it; only undo the spec overwrite
+        module.__spec__ = self._target_spec
+
+
+class _AliasFinder(MetaPathFinder):
+    """Resolve `import app.<m>` to the top-level `<m>` for modules in `_MODULES`."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        pkg, _, name = fullname.rpartition(".")
+        if pkg != __name__ or name not in _MODULES:
+            return None
+        # only alias modules that exist at the project root; everything else
+        # (e.g. app/config.py) goes through the normal finders
+        if PathFinder.find_spec(name, [_PROJECT_ROOT]) is None:
+            return None
+        return ModuleSpec(fullname, _AliasLoader(name))
+
+
+if not any(isinstance(f, _AliasFinder) for f in sys.meta_path):
+    sys.meta_path.insert(0, _AliasFinder())
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
     try:
-        _mod = importlib.import_module(_m)
-        # expose as attribute on this package
-        globals()[_m] = _mod
-        # register as a submodule name so `import app.<m>` works
-        sys.modules[f"{__name__}.{_m}"] = _mod
-    except Exception:
-        # If import fails, set a placeholder None; actual import errors will
-        # surface when the user tries to use the module.
-        globals()[_m] = None
+        # the import system binds the submodule as an attribute of this package
+        return import_module(f"{__name__}.{name}")
+    except ModuleNotFoundError as e:
+        if e.name != f"{__name__}.{name}":
+            raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from e
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
+
 
 __all__ = _MODULES
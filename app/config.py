@@ -19,6 +19,20 @@ CHROMA_PERSIST_DIR: str = "chroma_db"  # relative to project root
 COLLECTION_NAME: str = "multimodal_embeddings"
 COLLECTION_METADATA: Dict[str, str] = {"hnsw:space": "cosine"}
 
+# Concurrent search queries are coalesced into a single Chroma query; a batch
+# is flushed after this many milliseconds or once it holds this many queries
+SEARCH_BATCH_WINDOW_MS: float = 2.0
+SEARCH_BATCH_MAX_SIZE: int = 32
+
+# Images fetched by URL are cached (raw bytes, LRU) and served without a
+# network round-trip for IMAGE_CACHE_TTL_SECONDS; after that they are
+# revalidated with a conditional GET when the server sent an ETag. The cache
+# is bounded by entry count and total bytes; larger bodies are never cached
+IMAGE_CACHE_SIZE: int = 256
+IMAGE_CACHE_TTL_SECONDS: float = 300.0
+IMAGE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+IMAGE_CACHE_MAX_ITEM_BYTES: int = 4 * 1024 * 1024
+
 # FastAPI / Uvicorn host and port used when running `python main.py`
 HOST: str = "0.0.0.0"
 PORT: int = 8000
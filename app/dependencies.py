@@ -3,13 +3,18 @@
 This mirrors the top-level `dependencies.py` but references `app.*` modules to
 ensure package-style imports work consistently.
 """
-from services.embedding_service import EmbeddingService
+import logging
+
+from app.logger import get_logger, log_event
+from services.embedding_service import get_embedding_service
 from app.vector_db import VectorDB
 from services.ingest import IngestService
 from services.search import SearchService
 from app.config import CHROMA_PERSIST_DIR
 
-_embedding_service = EmbeddingService()
+log = get_logger("dependencies")
+
+_embedding_service = get_embedding_service()
 _vector_db = VectorDB(persist_directory=CHROMA_PERSIST_DIR)
 
 ingest_service = IngestService(_embedding_service, _vector_db)
@@ -18,3 +23,17 @@ search_service = SearchService(_embedding_service, _vector_db)
 embedding_service = _embedding_service
 vector_db = _vector_db
 
+
+def warmup() -> None:
+    """Run one embedding and one vector query so the first real request is not a cold start.
+
+    This pulls the CLIP weights and tokenizer caches into memory and faults in
+    the HNSW index pages. Failures are logged and otherwise ignored.
+    """
+    try:
+        vectors = _embedding_service.embed(text="warmup", image=None)
+        if _vector_db.collection.count() > 0:
+            _vector_db.search_many(vectors, top_k=1)
+        log.info("warmup_complete")
+    except Exception as e:
+        log_event(log, logging.ERROR, "warmup_error", exc_info=True, error=str(e))
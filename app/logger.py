@@ -2,15 +2,22 @@
 import logging
 import os
 import json
+import time
 import contextvars
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
 from app.config import LOG_LEVEL as CONFIG_LOG_LEVEL
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", CONFIG_LOG_LEVEL).upper()
 
 request_id_ctx: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+# bound once so the formatter hot path skips the global + attribute lookup
+_request_id_ctx_get = request_id_ctx.get
 
 
 def set_request_id(rid: Optional[str]) -> None:
@@ -26,9 +33,27 @@ def clear_request_id() -> None:
 
 
 class StructuredJsonFormatter(logging.Formatter):
+    # fallback encoder when orjson is not installed: compact separators and no
+    # ASCII escaping, built once instead of per call
+    _json_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # the "YYYY-MM-DDTHH:MM:SS" part only changes once per second;
+        # stored as one tuple so concurrent handlers never see a torn update
+        self._ts_cache: Tuple[int, str] = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        cached_second, prefix = self._ts_cache
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._ts_cache = (second, prefix)
+        return "%s.%03d+00:00" % (prefix, (created - second) * 1000)
+
     def format(self, record: logging.LogRecord) -> str:
         payload: Dict[str, Any] = {
-            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "ts": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "module": record.module,
@@ -36,17 +61,30 @@ class StructuredJsonFormatter(logging.Formatter):
             "line": record.lineno,
             "message": record.getMessage(),
         }
-        try:
-            rid = get_request_id()
-        except Exception:
-            rid = None
+        # ContextVar.get never raises when a default is set
+        rid = _request_id_ctx_get()
         if rid:
             payload["request_id"] = rid
-        if hasattr(record, "extra") and isinstance(record.extra, dict):
-            payload.update(record.extra)
+        extra = getattr(record, "extra", None)
+        if isinstance(extra, dict):
+            payload.update(extra)
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(payload)
+        if orjson is not None:
+            return orjson.dumps(payload).decode()
+        return self._json_encode(payload)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, *, exc_info: bool = False, **fields: Any) -> None:
+    """Log `event` with structured `fields`, building the record only if `level` is enabled.
+
+    Fields are passed as the record's `extra` payload, which
+    StructuredJsonFormatter merges into the JSON line. Pass `exc_info=True`
+    from an `except` block to attach the traceback, as `logger.exception` does.
+    """
+    if logger.isEnabledFor(level):
+        # stacklevel=2 attributes the record to the caller rather than this helper
+        logger._log(level, event, (), exc_info=exc_info, extra={"extra": fields}, stacklevel=2)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -2,7 +2,7 @@
 
 This is a copy of the top-level `schemas.py` to allow imports via `app.schemas`.
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Dict, Any, List
 
 
@@ -23,6 +23,16 @@ class BatchIngestItem(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata to store")
 
 
+class MultipartIngestItem(BatchIngestItem):
+    image_part: Optional[int] = Field(None, ge=0, description="Index of the uploaded image part holding this item's image")
+
+    @model_validator(mode="after")
+    def _one_image_source(self):
+        if self.image and self.image_part is not None:
+            raise ValueError("Set only one of 'image' or 'image_part'")
+        return self
+
+
 class BatchIngestItemResult(BaseModel):
     index: int
     ids: Optional[List[str]] = None
@@ -3,29 +3,96 @@
 This is the same code as the top-level `utils.py` but available under
 `app.utils` for package-style imports.
 """
-import base64
+import binascii
 import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from PIL import Image
 import requests
-from app.logger import get_logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_MAX_ITEM_BYTES, IMAGE_CACHE_SIZE, IMAGE_CACHE_TTL_SECONDS
+from app.logger import get_logger, log_event
 
 log = get_logger("utils")
 
+# shared session so repeated fetches from the same host reuse pooled keep-alive connections
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=0.2))
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
 
-def load_image_from_url(url: str) -> Image.Image:
-    response = requests.get(url, timeout=10)
+# url -> (raw bytes, etag, fetched_at); raw bytes are stored rather than decoded
+# images because PIL images are mutable and may be shared across threads
+_image_cache: "OrderedDict[str, Tuple[bytes, Optional[str], float]]" = OrderedDict()
+_image_cache_lock = threading.Lock()
+# total size of the cached bodies, kept alongside _image_cache under the same lock
+_image_cache_bytes = 0
+
+
+def _cache_put(url: str, content: bytes, etag: Optional[str]) -> None:
+    global _image_cache_bytes
+    with _image_cache_lock:
+        old = _image_cache.pop(url, None)
+        if old is not None:
+            _image_cache_bytes -= len(old[0])
+        if len(content) > IMAGE_CACHE_MAX_ITEM_BYTES:
+            return
+        _image_cache[url] = (content, etag, time.monotonic())
+        _image_cache_bytes += len(content)
+        while len(_image_cache) > IMAGE_CACHE_SIZE or _image_cache_bytes > IMAGE_CACHE_MAX_BYTES:
+            _, (evicted, _, _) = _image_cache.popitem(last=False)
+            _image_cache_bytes -= len(evicted)
+
+
+def _fetch_image_bytes(url: str) -> Tuple[bytes, Optional[str], bool]:
+    """Return (body, etag, store): `store` is True when the caller should (re)cache the body."""
+    with _image_cache_lock:
+        entry = _image_cache.get(url)
+        if entry is not None:
+            _image_cache.move_to_end(url)
+
+    headers = None
+    if entry is not None:
+        content, etag, fetched_at = entry
+        if time.monotonic() - fetched_at < IMAGE_CACHE_TTL_SECONDS:
+            return content, etag, False
+        if etag:
+            headers = {"If-None-Match": etag}
+
+    response = _session.get(url, timeout=10, headers=headers)
+    if headers is not None and response.status_code == 304:
+        return content, etag, True
     response.raise_for_status()
-    img = Image.open(io.BytesIO(response.content))
-    log.debug("loaded_image_from_url", extra={"url": url, "size": img.size})
+    return response.content, response.headers.get("ETag"), True
+
+
+def load_image_from_url(url: str) -> Image.Image:
+    content, etag, store = _fetch_image_bytes(url)
+    img = Image.open(io.BytesIO(content))
+    # only bodies PIL recognises as images are cached
+    if store:
+        _cache_put(url, content, etag)
+    log_event(log, logging.DEBUG, "loaded_image_from_url", url=url, size=img.size)
     return img
 
 
 def load_image_from_base64(base64_string: str) -> Image.Image:
-    if ',' in base64_string:
-        base64_string = base64_string.split(',')[1]
-    image_data = base64.b64decode(base64_string)
+    # strip an optional "data:<mime>;base64," prefix
+    head, sep, tail = base64_string.partition(',')
+    image_data = binascii.a2b_base64(tail if sep else head)
+    # BytesIO shares the bytes buffer until written to, so this does not copy
     img = Image.open(io.BytesIO(image_data))
-    log.debug("loaded_image_from_base64", extra={"size": img.size})
+    log_event(log, logging.DEBUG, "loaded_image_from_base64", size=img.size)
+    return img
+
+
+def load_image_from_bytes(image_data: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(image_data))
+    log_event(log, logging.DEBUG, "loaded_image_from_bytes", size=img.size)
     return img
 
 
@@ -34,4 +101,3 @@ def load_image(image_input: str) -> Image.Image:
         return load_image_from_url(image_input)
     else:
         return load_image_from_base64(image_input)
-
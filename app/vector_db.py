@@ -1,21 +1,57 @@
 """ChromaDB-based vector DB exposed under app.vector_db."""
+import asyncio
+import json
+import logging
+import os
+from itertools import accumulate
 import chromadb
+import numpy as np
 from chromadb.config import Settings
-from typing import List, Dict, Optional, Any
-import uuid
-from app.logger import get_logger
+from typing import List, Dict, Optional, Any, Sequence, Tuple, Union
+from starlette.concurrency import run_in_threadpool
+from app.logger import get_logger, log_event, get_request_id, set_request_id
 
 log = get_logger("vector_db")
 
+# a single embedding: a 1-D float array as produced by EmbeddingService, or a plain list
+Embedding = Union[np.ndarray, List[float]]
+
+
+class _PendingBatch:
+    """Search queries sharing the same metadata filter, waiting to be flushed together."""
+
+    __slots__ = ("where", "items", "request_ids", "full")
+
+    def __init__(self, where: Optional[Dict[str, Any]]):
+        self.where = where
+        self.items: List[Tuple[Embedding, int, "asyncio.Future[List[Dict[str, Any]]]"]] = []
+        # request ids of the queued queries, logged with the flush since one
+        # Chroma call serves all of them
+        self.request_ids: List[Optional[str]] = []
+        self.full = asyncio.Event()
+
+
+def _new_ids(n: int) -> List[str]:
+    """Return `n` random 128-bit ids as 32-char hex strings, drawn with a single urandom call."""
+    raw = memoryview(os.urandom(16 * n))
+    return [raw[i:i + 16].hex() for i in range(0, 16 * n, 16)]
+
+
+def _where_key(where: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(where, sort_keys=True, default=str)
+
 
 class VectorDB:
     def __init__(self, persist_directory: str = None):
         try:
             from app.config import CHROMA_PERSIST_DIR, COLLECTION_NAME, COLLECTION_METADATA
+            from app.config import SEARCH_BATCH_WINDOW_MS, SEARCH_BATCH_MAX_SIZE
         except Exception:
             CHROMA_PERSIST_DIR = "./chroma_db"
             COLLECTION_NAME = "multimodal_embeddings"
             COLLECTION_METADATA = {"hnsw:space": "cosine"}
+            SEARCH_BATCH_WINDOW_MS = 2.0
+            SEARCH_BATCH_MAX_SIZE = 32
 
         pd = persist_directory or CHROMA_PERSIST_DIR
 
@@ -27,10 +63,22 @@ class VectorDB:
             name=COLLECTION_NAME,
             metadata=COLLECTION_METADATA
         )
-        log.info("chroma_initialized", extra={"path": pd, "collection": COLLECTION_NAME})
-
-    def add(self, embedding: List[float], text: Optional[str] = None, image_url: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> str:
-        doc_id = str(uuid.uuid4())
+        # bound methods cached once; the hot paths call these instead of self.collection.<op>
+        self._add = self.collection.add
+        self._query = self.collection.query
+        self._delete = self.collection.delete
+        log_event(log, logging.INFO, "chroma_initialized", path=pd, collection=COLLECTION_NAME)
+
+        # state for search_async: batches keyed by filter, and queries currently running
+        self._batch_window = SEARCH_BATCH_WINDOW_MS / 1000.0
+        self._batch_max_size = SEARCH_BATCH_MAX_SIZE
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._inflight = 0
+        # strong references to scheduled flush tasks so they are not garbage collected mid-flight
+        self._flush_tasks: "set[asyncio.Task[None]]" = set()
+
+    def add(self, embedding: Embedding, text: Optional[str] = None, image_url: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> str:
+        doc_id = _new_ids(1)[0]
         doc_metadata = metadata or {}
         if text:
             doc_metadata["text"] = text
@@ -40,85 +88,159 @@ class VectorDB:
         doc_metadata["has_image"] = image_url is not None
         document = text if text else f"Image: {image_url[:50] if image_url else 'N/A'}"
         try:
-            self.collection.add(ids=[doc_id], embeddings=[embedding], documents=[document], metadatas=[doc_metadata])
-            log.debug("added_vector", extra={"id": doc_id, "has_text": bool(text), "has_image": bool(image_url)})
+            self._add(ids=[doc_id], embeddings=[np.asarray(embedding, dtype=np.float32).tolist()], documents=[document], metadatas=[doc_metadata])
+            log_event(log, logging.DEBUG, "added_vector", id=doc_id, has_text=bool(text), has_image=bool(image_url))
         except Exception as e:
-            log.exception("add_vector_error", extra={"error": str(e)})
+            log_event(log, logging.ERROR, "add_vector_error", exc_info=True, error=str(e))
             raise
         return doc_id
 
-    def add_many(self, embeddings_per_item: List[List[List[float]]], texts: List[Optional[str]], image_urls: List[Optional[str]], metadatas: List[Optional[Dict[str, Any]]]) -> List[List[str]]:
-        flat_ids: List[str] = []
-        flat_embeddings: List[List[float]] = []
+    def add_many(self, embeddings_per_item: Sequence[Union[np.ndarray, List[List[float]]]], texts: List[Optional[str]], image_urls: List[Optional[str]], metadatas: List[Optional[Dict[str, Any]]]) -> List[List[str]]:
+        # offsets[i]:offsets[i + 1] is the slice of flat rows belonging to item i
+        offsets = [0, *accumulate(len(vectors) for vectors in embeddings_per_item)]
+        new_ids = _new_ids(offsets[-1] + len(embeddings_per_item))
+        flat_ids: List[str] = new_ids[:offsets[-1]]
         flat_documents: List[str] = []
         flat_metas: List[Dict[str, Any]] = []
 
-        entity_ids = [str(uuid.uuid4()) for _ in embeddings_per_item]
+        entity_ids = new_ids[offsets[-1]:]
 
         for i, vectors in enumerate(embeddings_per_item):
             text = texts[i] if i < len(texts) else None
             image_url = image_urls[i] if i < len(image_urls) else None
             meta = metadatas[i] if i < len(metadatas) else None
-            base_meta = meta.copy() if meta else {}
-            base_meta["entity_id"] = entity_ids[i]
-            base_meta["has_text"] = text is not None
-            base_meta["has_image"] = image_url is not None
+            if len(vectors) == 0:
+                continue
+            # the first vector's metadata doubles as the base the others are unpacked from,
+            # so an entity with K vectors allocates exactly K metadata dicts
+            first_meta = {
+                **(meta or {}),
+                "entity_id": entity_ids[i],
+                "has_text": text is not None,
+                "has_image": image_url is not None,
+                "vector_index": 0,
+            }
             document = text if text else f"Image: {image_url[:50] if image_url else 'N/A'}"
-            for sub_idx, emb in enumerate(vectors):
-                vid = str(uuid.uuid4())
-                per_vector_meta = base_meta.copy()
-                per_vector_meta["vector_index"] = sub_idx
-                flat_ids.append(vid)
-                flat_embeddings.append(emb)
-                flat_documents.append(document)
-                flat_metas.append(per_vector_meta)
+            flat_documents.extend([document] * len(vectors))
+            flat_metas.append(first_meta)
+            flat_metas.extend([{**first_meta, "vector_index": j} for j in range(1, len(vectors))])
 
         if flat_ids:
+            # each item is a (K_i, dim) array (or nested list); stack them into one
+            # contiguous float32 block and convert to lists once at the Chroma boundary
+            flat_embeddings = np.concatenate(
+                [np.asarray(vectors, dtype=np.float32) for vectors in embeddings_per_item if len(vectors) > 0]
+            ).tolist()
             try:
-                self.collection.add(ids=flat_ids, embeddings=flat_embeddings, documents=flat_documents, metadatas=flat_metas)
-                log.info("added_many_vectors", extra={"count": len(flat_ids), "entity_count": len(embeddings_per_item)})
+                self._add(ids=flat_ids, embeddings=flat_embeddings, documents=flat_documents, metadatas=flat_metas)
+                log_event(log, logging.INFO, "added_many_vectors", count=len(flat_ids), entity_count=len(embeddings_per_item))
             except Exception as e:
-                log.exception("add_many_error", extra={"error": str(e)})
+                log_event(log, logging.ERROR, "add_many_error", exc_info=True, error=str(e))
                 raise
 
-        returned_ids: List[List[str]] = []
-        idx = 0
-        for vectors in embeddings_per_item:
-            count = len(vectors)
-            returned_ids.append(flat_ids[idx: idx + count])
-            idx += count
+        return [flat_ids[offsets[i]:offsets[i + 1]] for i in range(len(embeddings_per_item))]
 
-        return returned_ids
+    def search(self, query_embedding: Embedding, top_k: int = 10, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return self.search_many([query_embedding], top_k=top_k, filter_metadata=filter_metadata)[0]
 
-    def search(self, query_embedding: List[float], top_k: int = 10, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def search_many(self, query_embeddings: Sequence[Embedding], top_k: int = 10, filter_metadata: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """Run several queries sharing the same filter in a single Chroma call."""
         where = filter_metadata if filter_metadata else None
         try:
-            results = self.collection.query(query_embeddings=[query_embedding], n_results=top_k, where=where)
+            # chromadb 0.4.x validates embeddings as lists of Python floats
+            query_lists = np.asarray(query_embeddings, dtype=np.float32).tolist()
+            results = self._query(query_embeddings=query_lists, n_results=top_k, where=where)
         except Exception as e:
-            log.exception("query_error", extra={"error": str(e)})
+            log_event(log, logging.ERROR, "query_error", exc_info=True, error=str(e))
             raise
-        formatted_results = []
-        if results['ids'] and len(results['ids'][0]) > 0:
-            for i in range(len(results['ids'][0])):
-                formatted_results.append({
-                    "id": results['ids'][0][i],
-                    "similarity_score": round(1 - results['distances'][0][i], 4), # round to 4 decimal places
-                    "metadata": results['metadatas'][0][i],
-                    "document": results['documents'][0][i]
-                })
-        log.debug("search_completed", extra={"top_k": top_k, "returned": len(formatted_results)})
-        return formatted_results
+        if not results['ids']:
+            return [[] for _ in query_embeddings]
+        formatted_per_query: List[List[Dict[str, Any]]] = [
+            [
+                # round to 4 decimal places
+                {"id": rid, "similarity_score": round(1.0 - dist, 4), "metadata": meta, "document": doc}
+                for rid, dist, meta, doc in zip(ids, dists, metas, docs)
+            ]
+            for ids, dists, metas, docs in zip(results['ids'], results['distances'], results['metadatas'], results['documents'])
+        ]
+        log_event(log, logging.DEBUG, "search_completed", queries=len(query_embeddings), top_k=top_k)
+        return formatted_per_query
+
+    async def search_async(self, query_embedding: Embedding, top_k: int = 10, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search from async code, coalescing concurrent queries into batched Chroma calls.
+
+        When nothing else is queued or running the query is issued immediately;
+        otherwise it joins the pending batch for its filter, which is flushed
+        after the batch window or once it reaches the maximum batch size.
+        """
+        loop = asyncio.get_running_loop()
+        where = filter_metadata if filter_metadata else None
+        key = _where_key(where)
+        batch = self._pending.get(key)
+
+        if batch is None and self._inflight == 0:
+            self._inflight += 1
+            try:
+                # run_in_threadpool copies contextvars, so search logs keep the request id
+                return await run_in_threadpool(self.search, query_embedding, top_k, where)
+            finally:
+                self._inflight -= 1
+
+        if batch is None:
+            batch = _PendingBatch(where)
+            self._pending[key] = batch
+            task = loop.create_task(self._flush_batch(key, batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        future = loop.create_future()
+        batch.items.append((query_embedding, top_k, future))
+        batch.request_ids.append(get_request_id())
+        if len(batch.items) >= self._batch_max_size:
+            # later queries start a fresh batch instead of growing this one
+            del self._pending[key]
+            batch.full.set()
+        return await future
+
+    async def _flush_batch(self, key: str, batch: _PendingBatch) -> None:
+        # this task inherited the context of whichever query opened the batch;
+        # the batched Chroma call belongs to no single request
+        set_request_id(None)
+        try:
+            await asyncio.wait_for(batch.full.wait(), timeout=self._batch_window)
+        except asyncio.TimeoutError:
+            pass
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+
+        embeddings = [emb for emb, _, _ in batch.items]
+        max_k = max(k for _, k, _ in batch.items)
+        log_event(log, logging.DEBUG, "search_batch_flushed", size=len(embeddings), request_ids=batch.request_ids)
+        self._inflight += 1
+        try:
+            results = await run_in_threadpool(self.search_many, embeddings, max_k, batch.where)
+        except Exception as e:
+            log_event(log, logging.ERROR, "search_batch_error", error=str(e), request_ids=batch.request_ids)
+            for _, _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._inflight -= 1
+
+        for (_, k, future), rows in zip(batch.items, results):
+            if not future.done():
+                future.set_result(rows[:k])
 
 
     def delete(self, ids: List[str]) -> int:
         if not ids:
-            log.debug("delete_called_with_no_ids")
+            log_event(log, logging.DEBUG, "delete_called_with_no_ids")
             return 0
         try:
-            self.collection.delete(ids=ids)
-            log.info("deleted_vectors", extra={"requested": len(ids)})
+            self._delete(ids=ids)
+            log_event(log, logging.INFO, "deleted_vectors", requested=len(ids))
             return len(ids)
         except Exception as e:
-            log.exception("delete_error", extra={"error": str(e)})
+            log_event(log, logging.ERROR, "delete_error", exc_info=True, error=str(e))
             raise
 
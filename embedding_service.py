@@ -1,9 +1,10 @@
 """Embedding service for generating text and image embeddings using CLIP."""
+import logging
 from typing import Optional, List, Tuple, Any, cast
 import torch
 import numpy as np
 from PIL import Image
-from app.logger import get_logger
+from app.logger import get_logger, log_event
 
 log = get_logger("embedding_service")
 
@@ -31,7 +32,7 @@ class EmbeddingService:
         chosen_model = model_name or MODEL_NAME
         self.model = SentenceTransformer(chosen_model, device=self.device)
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
-        log.info("model_loaded", extra={"model": chosen_model, "device": self.device, "dim": self.embedding_dim})
+        log_event(log, logging.INFO, "model_loaded", model=chosen_model, device=self.device, dim=self.embedding_dim)
 
     def _normalize_embedding(self, embedding: np.ndarray) -> np.ndarray:
         """
@@ -60,19 +61,21 @@ class EmbeddingService:
     def embed_text(self, text: str) -> List[float]:
         embedding = self.model.encode(text, convert_to_numpy=True)
         embedding = self._normalize_embedding(embedding)
-        log.debug("embed_text", extra={"text_snippet": text[:100]})
+        # guarded so the slice is skipped when DEBUG is off
+        if log.isEnabledFor(logging.DEBUG):
+            log_event(log, logging.DEBUG, "embed_text", text_snippet=text[:100])
         return embedding.tolist()
 
     def embed_image(self, image: Image.Image) -> List[float]:
         pil_img = image.convert("RGB")
         embedding = self.model.encode(cast(Any, [pil_img]), convert_to_numpy=True)
         embedding = self._normalize_embedding(embedding)
-        log.debug("embed_image", extra={"image_size": pil_img.size})
+        log_event(log, logging.DEBUG, "embed_image", image_size=pil_img.size)
         return embedding[0].tolist()
 
     def embed(self, text: Optional[str] = None, image: Optional[Image.Image] = None) -> List[List[float]]:
         batch_result = self.embed_batch([(text, image)])
-        log.debug("embed_called", extra={"has_text": text is not None, "has_image": image is not None})
+        log_event(log, logging.DEBUG, "embed_called", has_text=text is not None, has_image=image is not None)
         return batch_result[0]
 
     def embed_batch(self, items: List[Tuple[Optional[str], Optional[Image.Image]]]) -> List[List[List[float]]]:
@@ -104,7 +107,7 @@ class EmbeddingService:
             for idx, emb in zip(image_indices, image_embs):
                 image_emb_by_index[idx] = emb
 
-        log.debug("embed_batch_completed", extra={"items": len(items), "text_count": len(text_values), "image_count": len(image_values)})
+        log_event(log, logging.DEBUG, "embed_batch_completed", items=len(items), text_count=len(text_values), image_count=len(image_values))
 
         result_embeddings: List[List[List[float]]] = []
         for i, (text, image) in enumerate(items):
@@ -4,6 +4,7 @@ This is largely the same as the top-level `example_usage.py` but imports
 from `app` where applicable.
 """
 
+import logging
 import sys
 from pathlib import Path
 
@@ -14,7 +15,7 @@ sys.path.insert(0, str(project_root))
 import requests
 import base64
 from app.config import BASE_URL
-from app.logger import get_logger
+from app.logger import get_logger, log_event
 
 log = get_logger("example_usage")
 BASE_URL = BASE_URL
@@ -29,7 +30,7 @@ def ingest_text_example():
             "metadata": {"category": "nature", "type": "description"}
         }
     )
-    log.info("ingest_text_example_done", extra={"status": response.status_code})
+    log_event(log, logging.INFO, "ingest_text_example_done", status=response.status_code)
     return response.json()["ids"]
 
 # ... rest of functions unchanged (omitted here for brevity) ...
@@ -45,7 +46,7 @@ def ingest_image_example():
             "metadata": {"source": "unsplash", "category": "nature"}
         }
     )
-    log.info("ingest_image_example_done", extra={"status": response.status_code})
+    log_event(log, logging.INFO, "ingest_image_example_done", status=response.status_code)
     return response.json()["ids"]
 
 
@@ -62,7 +63,7 @@ def ingest_base64_image_example():
             "metadata": {"source": "base64", "category": "test"}
         }
     )
-    log.info("ingest_base64_image_example_done", extra={"status": response.status_code})
+    log_event(log, logging.INFO, "ingest_base64_image_example_done", status=response.status_code)
     return response.json()["ids"]
 
 
@@ -77,7 +78,7 @@ def ingest_multimodal_example():
             "metadata": {"category": "landscape", "has_both": True}
         }
     )
-    log.info("ingest_multimodal_done", extra={"status": response.status_code})
+    log_event(log, logging.INFO, "ingest_multimodal_done", status=response.status_code)
     return response.json()["ids"]
 
 
@@ -90,9 +91,9 @@ def search_text_example():
             "top_k": 5
         }
     )
-    log.info("search_text_example_done", extra={"status": response.status_code})
+    log_event(log, logging.INFO, "search_text_example_done", status=response.status_code)
     result = response.json()
-    log.info("search_text_results", extra={"query_type": result.get('query_type'), "count": len(result.get('results', []))})
+    log_event(log, logging.INFO, "search_text_results", query_type=result.get('query_type'), count=len(result.get('results', [])))
     for i, res in enumerate(result['results'], 1):
         print(f"\n  Result {i}:")
         print(f"    ID: {res['id']}")
@@ -111,9 +112,9 @@ def search_with_filter_example():
             "filter_metadata": {"category": "nature"}
         }
     )
-    log.info("search_with_filter_example_done", extra={"status": response.status_code})
+    log_event(log, logging.INFO, "search_with_filter_example_done", status=response.status_code)
     result = response.json()
-    log.info("search_with_filter_results", extra={"count": len(result.get('results', []))})
+    log_event(log, logging.INFO, "search_with_filter_results", count=len(result.get('results', [])))
     for i, res in enumerate(result['results'], 1):
         print(f"  {i}. Similarity: {res['similarity_score']:.4f}, Category: {res['metadata'].get('category', 'N/A')}")
 
@@ -124,7 +125,7 @@ def delete_example():
         f"{BASE_URL}/items",
         json={"ids": ["id1", "id2"]}
     )
-    log.info("delete_example_done", extra={"status": response.status_code})
+    log_event(log, logging.INFO, "delete_example_done", status=response.status_code)
     return response.json()
 
 if __name__ == "__main__":
@@ -135,7 +136,7 @@ if __name__ == "__main__":
     try:
         health = requests.get(f"{BASE_URL}/health")
         if health.status_code != 200:
-            log.error("api_not_running", extra={"status": health.status_code})
+            log_event(log, logging.ERROR, "api_not_running", status=health.status_code)
             print("Error: API is not running. Please start the server first.")
             print("Run: python main.py")
             exit(1)
@@ -162,6 +163,6 @@ if __name__ == "__main__":
         print("Please make sure the server is running:")
         print("  python main.py")
     except Exception as e:
-        log.exception("example_usage_error", extra={"error": str(e)})
+        log_event(log, logging.ERROR, "example_usage_error", exc_info=True, error=str(e))
         print(f"Error: {e}")
 
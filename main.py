@@ -1,29 +1,52 @@
-from fastapi import FastAPI, HTTPException
+import json
+import logging
+from contextlib import asynccontextmanager
+
+from typing import List
+
+from fastapi import FastAPI, File, Form, HTTPException, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from app.utils import load_image
 from app.config import CORS_ALLOW_ORIGINS, HOST, PORT
-from app.logger import get_logger
+from app.logger import get_logger, log_event
 from app.schemas import (
     IngestRequest,
     IngestResponse,
     BatchIngestRequest,
     BatchIngestResponse,
+    MultipartIngestItem,
     SearchRequest,
     SearchResponse,
     DeleteRequest,
     DeleteResponse,
 )
-from app.dependencies import ingest_service, search_service, vector_db
+from app.dependencies import ingest_service, search_service, vector_db, warmup
 from app.middleware import request_id_middleware_factory
 
 
 # structured logger for the service
 log = get_logger("main")
 
+
+def _model_response(model: BaseModel) -> Response:
+    """Serialize an already-validated response model once, skipping FastAPI's response_model revalidation."""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pay model load and index cold-cache cost before serving traffic
+    warmup()
+    yield
+
+
 app = FastAPI(
     title="Multimodal Vector Search API",
     description="API for ingesting and searching text and images using vector embeddings",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Enable CORS
@@ -39,29 +62,35 @@ app.add_middleware(
 app.middleware("http")(request_id_middleware_factory(app))
 
 
+# constant bodies for / and /health, serialized once at import
+_ROOT_BODY = json.dumps({
+    "message": "Multimodal Vector Search API",
+    "version": "1.0.0",
+    "endpoints": {
+        "POST /ingest": "Ingest text and/or images",
+        "POST /ingest/batch": "Batch ingest multiple items",
+        "POST /ingest/batch/multipart": "Batch ingest multiple items with raw image uploads",
+        "POST /search": "Search for similar items",
+        "GET /health": "Health check"
+    }
+}).encode()
+_HEALTH_BODY = json.dumps({"status": "healthy"}).encode()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
-    return {
-        "message": "Multimodal Vector Search API",
-        "version": "1.0.0",
-        "endpoints": {
-            "POST /ingest": "Ingest text and/or images",
-            "POST /ingest/batch": "Batch ingest multiple items",
-            "POST /search": "Search for similar items",
-            "GET /health": "Health check"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
 async def health():
     """Health check endpoint."""
     log.debug("health_check")
-    return {"status": "healthy"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
-@app.post("/ingest", response_model=IngestResponse)
+@app.post("/ingest", responses={200: {"model": IngestResponse}})
 async def ingest(request: IngestRequest):
     """
     Ingest text and/or images into the vector database.
@@ -69,29 +98,55 @@ async def ingest(request: IngestRequest):
     At least one of text or image must be provided.
     """
     try:
-        return ingest_service.ingest(request)
+        # image fetch/decode and embedding are blocking; keep them off the event loop
+        return _model_response(await run_in_threadpool(ingest_service.ingest, request))
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        log.exception("ingest_error", extra={"error": str(e)})
+        log_event(log, logging.ERROR, "ingest_error", exc_info=True, error=str(e))
         raise HTTPException(status_code=500, detail=f"Error during ingestion: {str(e)}")
 
 
 # New batch ingest endpoint (multivector support)
-@app.post("/ingest/batch", response_model=BatchIngestResponse)
+@app.post("/ingest/batch", responses={200: {"model": BatchIngestResponse}})
 async def ingest_batch(request: BatchIngestRequest):
     """Batch ingest multiple items. Stores multiple vectors per entity."""
     if not request.items:
-        return BatchIngestResponse(results=[])
+        return _model_response(BatchIngestResponse(results=[]))
+
+    try:
+        return _model_response(await run_in_threadpool(ingest_service.batch_ingest, request))
+    except Exception as e:
+        log_event(log, logging.ERROR, "batch_ingest_error", exc_info=True, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Error during batch ingestion: {str(e)}")
+
+
+_multipart_items = TypeAdapter(List[MultipartIngestItem])
+
+
+@app.post("/ingest/batch/multipart", responses={200: {"model": BatchIngestResponse}})
+async def ingest_batch_multipart(items: str = Form(...), images: List[UploadFile] = File(default=[])):
+    """
+    Batch ingest with images sent as raw multipart parts instead of base64 strings.
+
+    `items` is a JSON list of batch items; an item's `image_part` indexes into `images`.
+    """
+    try:
+        parsed = _multipart_items.validate_json(items)
+    except ValidationError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if not parsed:
+        return _model_response(BatchIngestResponse(results=[]))
 
     try:
-        return ingest_service.batch_ingest(request)
+        image_parts = [(f.filename, await f.read()) for f in images]
+        return _model_response(await run_in_threadpool(ingest_service.batch_ingest_multipart, parsed, image_parts))
     except Exception as e:
-        log.exception("batch_ingest_error", extra={"error": str(e)})
+        log_event(log, logging.ERROR, "batch_ingest_error", exc_info=True, error=str(e))
         raise HTTPException(status_code=500, detail=f"Error during batch ingestion: {str(e)}")
 
 
-@app.post("/search", response_model=SearchResponse)
+@app.post("/search", responses={200: {"model": SearchResponse}})
 async def search(request: SearchRequest):
     """
     Search for similar items using text or image query.
@@ -101,14 +156,17 @@ async def search(request: SearchRequest):
     try:
         # If image query provided, load the image and use search_with_image
         if request.query_image:
-            img = load_image(request.query_image)
-            return search_service.search_with_image(img, top_k=request.top_k, filter_metadata=request.filter_metadata)
-        # otherwise do a text search
-        return search_service.search(request)
+            # HTTP fetch and PIL decode are blocking; run them in the threadpool
+            img = await run_in_threadpool(load_image, request.query_image)
+            result = await search_service.search_with_image_async(img, top_k=request.top_k, filter_metadata=request.filter_metadata)
+        else:
+            # otherwise do a text search
+            result = await search_service.search_async(request)
+        return _model_response(result)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        log.exception("search_error", extra={"error": str(e)})
+        log_event(log, logging.ERROR, "search_error", exc_info=True, error=str(e))
         raise HTTPException(status_code=500, detail=f"Error during search: {str(e)}")
 
 
@@ -121,11 +179,11 @@ async def delete_items(request: DeleteRequest):
         deleted = vector_db.delete(request.ids)
         return DeleteResponse(deleted_count=deleted, message=f"Requested deletion of {deleted} ids")
     except Exception as e:
-        log.exception("delete_items_error", extra={"error": str(e)})
+        log_event(log, logging.ERROR, "delete_items_error", exc_info=True, error=str(e))
         raise HTTPException(status_code=500, detail=f"Error deleting items: {str(e)}")
 
 
 if __name__ == "__main__":
     import uvicorn
-    log.info("starting_uvicorn", extra={"host": HOST, "port": PORT})
+    log_event(log, logging.INFO, "starting_uvicorn", host=HOST, port=PORT)
     uvicorn.run(app, host=HOST, port=PORT)
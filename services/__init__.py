@@ -1,9 +1,21 @@
 """Services package exports.
 
 This module re-exports the service classes for a cleaner import surface.
+The embedding service is resolved lazily so importing `services` does not
+pull in torch and sentence-transformers.
 """
 from services.ingest import IngestService
 from services.search import SearchService
 
-__all__ = ["IngestService", "SearchService"]
+_LAZY = ("EmbeddingService", "get_embedding_service")
 
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        from services import embedding_service
+
+        return getattr(embedding_service, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["IngestService", "SearchService", "EmbeddingService", "get_embedding_service"]
@@ -1,12 +1,31 @@
 """Embedding service for generating text and image embeddings using CLIP."""
-from typing import Optional, List, Tuple, Any, cast
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, List, Tuple, Any
 import torch
 import numpy as np
 from PIL import Image
-from app.logger import get_logger
+from app.logger import get_logger, log_event
 
 log = get_logger("embedding_service")
 
+# CLIP ViT-B/32 input resolution; JPEG decoding is never scaled below this
+_CLIP_INPUT_SIZE = (224, 224)
+
+
+def _prepare_image(image: Image.Image) -> Image.Image:
+    """Decode and convert an image to RGB ahead of the CLIP processor.
+
+    For JPEGs, `draft` lets the decoder downscale by DCT scaling while keeping
+    both sides at least the CLIP input size, which is much cheaper than
+    decoding at full resolution and resizing afterwards.
+    """
+    if image.format == "JPEG":
+        image.draft("RGB", _CLIP_INPUT_SIZE)
+    return image.convert("RGB")
+
 
 class EmbeddingService:
     def __init__(self, model_name: str = "clip-ViT-B-32"):
@@ -30,52 +49,81 @@ class EmbeddingService:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         chosen_model = model_name or MODEL_NAME
         self.model = SentenceTransformer(chosen_model, device=self.device)
+        if self.device == "cuda":
+            # CLIP runs ~2x faster in half precision with negligible recall loss
+            self.model.half()
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
-        log.info("model_loaded", extra={"model": chosen_model, "device": self.device, "dim": self.embedding_dim})
+        # PIL decode/convert releases the GIL, so a thread pool preprocesses batch images in parallel
+        self._preprocess_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="image-preprocess")
+        # side streams so the text and image towers of a mixed batch can run concurrently on the GPU
+        self._streams = (torch.cuda.Stream(), torch.cuda.Stream()) if self.device == "cuda" else None
+        log_event(log, logging.INFO, "model_loaded", model=chosen_model, device=self.device, dim=self.embedding_dim)
+
+    @torch.inference_mode()
+    def _encode_tensor(self, inputs: Any) -> torch.Tensor:
+        """Encode texts or images into L2-normalized embeddings, left on the model's device."""
+        return self.model.encode(inputs, convert_to_tensor=True, normalize_embeddings=True)
+
+    @staticmethod
+    def _to_numpy(embeddings: torch.Tensor) -> np.ndarray:
+        # float() is a no-op on CPU and upcasts the FP16 CUDA output, so callers always get float32
+        return embeddings.float().cpu().numpy()
+
+    def _encode(self, inputs: Any) -> np.ndarray:
+        """
+        Encode texts or images into L2-normalized embeddings.
 
-    def _normalize_embedding(self, embedding: np.ndarray) -> np.ndarray:
+        Normalization runs inside sentence-transformers on the output tensor
+        (on the GPU when available), and the result is copied to host memory
+        once as a float32 NumPy array.
         """
-        Normalize embedding vector to unit length (L2 normalization).
-        
-        Args:
-            embedding: NumPy array of shape (dim,) or (batch_size, dim)
-            
-        Returns:
-            Normalized embedding array with the same shape
+        return self._to_numpy(self._encode_tensor(inputs))
+
+    def _encode_text_and_images(self, text_values: List[str], image_values: List[Image.Image]) -> Tuple[np.ndarray, np.ndarray]:
         """
-        # Handle both single vector and batch cases
-        if embedding.ndim == 1:
-            # Single vector
-            norm = np.linalg.norm(embedding)
-            if norm > 0:
-                return embedding / norm
-            return embedding
-        else:
-            # Batch of vectors
-            norms = np.linalg.norm(embedding, axis=1, keepdims=True)
-            # Avoid division by zero - set zero norms to 1 (keeps zero vectors as zero)
-            norms = np.where(norms == 0, 1, norms)
-            return embedding / norms
-
-    def embed_text(self, text: str) -> List[float]:
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        embedding = self._normalize_embedding(embedding)
-        log.debug("embed_text", extra={"text_snippet": text[:100]})
-        return embedding.tolist()
-
-    def embed_image(self, image: Image.Image) -> List[float]:
-        pil_img = image.convert("RGB")
-        embedding = self.model.encode(cast(Any, [pil_img]), convert_to_numpy=True)
-        embedding = self._normalize_embedding(embedding)
-        log.debug("embed_image", extra={"image_size": pil_img.size})
-        return embedding[0].tolist()
-
-    def embed(self, text: Optional[str] = None, image: Optional[Image.Image] = None) -> List[List[float]]:
+        Encode a mixed batch, overlapping the text and image passes on separate CUDA streams.
+
+        While the text kernels run on one stream, the CPU is already
+        preprocessing images and queueing the image pass on the other.
+        """
+        text_stream, image_stream = self._streams
+        text_stream.wait_stream(torch.cuda.current_stream())
+        image_stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(text_stream):
+            text_embs = self._encode_tensor(text_values)
+        with torch.cuda.stream(image_stream):
+            image_embs = self._encode_tensor(image_values)
+        torch.cuda.synchronize()
+        return self._to_numpy(text_embs), self._to_numpy(image_embs)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        """Return the normalized embedding of `text` as a float32 array of shape (dim,)."""
+        embedding = self._encode(text)
+        # guarded so the slice is skipped when DEBUG is off
+        if log.isEnabledFor(logging.DEBUG):
+            log_event(log, logging.DEBUG, "embed_text", text_snippet=text[:100])
+        return embedding
+
+    def embed_image(self, image: Image.Image) -> np.ndarray:
+        """Return the normalized embedding of `image` as a float32 array of shape (dim,)."""
+        pil_img = _prepare_image(image)
+        embedding = self._encode([pil_img])
+        log_event(log, logging.DEBUG, "embed_image", image_size=pil_img.size)
+        return embedding[0]
+
+    def embed(self, text: Optional[str] = None, image: Optional[Image.Image] = None) -> np.ndarray:
         batch_result = self.embed_batch([(text, image)])
-        log.debug("embed_called", extra={"has_text": text is not None, "has_image": image is not None})
+        log_event(log, logging.DEBUG, "embed_called", has_text=text is not None, has_image=image is not None)
         return batch_result[0]
 
-    def embed_batch(self, items: List[Tuple[Optional[str], Optional[Image.Image]]]) -> List[List[List[float]]]:
+    def embed_batch(self, items: List[Tuple[Optional[str], Optional[Image.Image]]]) -> List[np.ndarray]:
+        """
+        Embed a batch of (text, image) pairs.
+
+        Returns one float32 array per item of shape (K, dim), with the text
+        vector first when both are present. Single-modality items are views
+        into the batch output rather than copies.
+        """
         text_indices = []
         text_values = []
         image_indices = []
@@ -87,35 +135,43 @@ class EmbeddingService:
                 text_values.append(text)
             if image is not None:
                 image_indices.append(i)
-                image_values.append(image.convert("RGB"))
-
-        text_emb_by_index = {}
-        image_emb_by_index = {}
+                image_values.append(image)
 
-        if text_values:
-            text_embs = self.model.encode(text_values, convert_to_numpy=True)
-            text_embs = self._normalize_embedding(text_embs)
-            for idx, emb in zip(text_indices, text_embs):
-                text_emb_by_index[idx] = emb
+        if len(image_values) > 1:
+            image_values = list(self._preprocess_pool.map(_prepare_image, image_values))
+        elif image_values:
+            image_values = [_prepare_image(image_values[0])]
 
-        if image_values:
-            image_embs = self.model.encode(cast(Any, image_values), convert_to_numpy=True)
-            image_embs = self._normalize_embedding(image_embs)
-            for idx, emb in zip(image_indices, image_embs):
-                image_emb_by_index[idx] = emb
+        # item index -> row in the corresponding batch output
+        text_row_by_index = {idx: row for row, idx in enumerate(text_indices)}
+        image_row_by_index = {idx: row for row, idx in enumerate(image_indices)}
 
-        log.debug("embed_batch_completed", extra={"items": len(items), "text_count": len(text_values), "image_count": len(image_values)})
-
-        result_embeddings: List[List[List[float]]] = []
-        for i, (text, image) in enumerate(items):
-            vectors_for_item: List[List[float]] = []
-            if i in text_emb_by_index:
-                vectors_for_item.append(text_emb_by_index[i].tolist())
-            if i in image_emb_by_index:
-                vectors_for_item.append(image_emb_by_index[i].tolist())
-            if not vectors_for_item:
+        if self._streams is not None and text_values and image_values:
+            text_embs, image_embs = self._encode_text_and_images(text_values, image_values)
+        else:
+            text_embs = self._encode(text_values) if text_values else None
+            image_embs = self._encode(image_values) if image_values else None
+
+        log_event(log, logging.DEBUG, "embed_batch_completed", items=len(items), text_count=len(text_values), image_count=len(image_values))
+
+        result_embeddings: List[np.ndarray] = []
+        for i in range(len(items)):
+            t = text_row_by_index.get(i)
+            m = image_row_by_index.get(i)
+            if t is not None and m is not None:
+                vectors_for_item = np.stack((text_embs[t], image_embs[m]))
+            elif t is not None:
+                vectors_for_item = text_embs[t:t + 1]
+            elif m is not None:
+                vectors_for_item = image_embs[m:m + 1]
+            else:
                 raise ValueError(f"Either text or image must be provided for item at index {i}")
             result_embeddings.append(vectors_for_item)
 
         return result_embeddings
 
+
+@lru_cache(maxsize=None)
+def get_embedding_service(model_name: str = "clip-ViT-B-32") -> EmbeddingService:
+    """Return the process-wide EmbeddingService for `model_name`, loading the model only once."""
+    return EmbeddingService(model_name)
@@ -2,12 +2,20 @@
 
 Provides IngestService which encapsulates single and batch ingest logic.
 """
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Dict, Any, Callable, Sequence
 from PIL import Image
 
 from app.logger import get_logger
-from app.utils import load_image
-from app.schemas import IngestRequest, IngestResponse, BatchIngestRequest, BatchIngestResponse, BatchIngestItemResult
+from app.utils import load_image, load_image_from_bytes
+from app.schemas import (
+    IngestRequest,
+    IngestResponse,
+    BatchIngestItem,
+    BatchIngestRequest,
+    BatchIngestResponse,
+    BatchIngestItemResult,
+    MultipartIngestItem,
+)
 
 log = get_logger("ingest_service")
 
@@ -41,7 +49,31 @@ class IngestService:
         return IngestResponse(ids=ids, message="Successfully ingested item")
 
     def batch_ingest(self, request: BatchIngestRequest) -> BatchIngestResponse:
-        if not request.items:
+        return self._batch_ingest(request.items, lambda item: (self._load_image_safe(item.image), item.image or None))
+
+    def batch_ingest_multipart(self, items: List[MultipartIngestItem], image_parts: List[Tuple[str, bytes]]) -> BatchIngestResponse:
+        """Batch ingest where images arrive as raw uploaded parts referenced by ``image_part``.
+
+        Items without ``image_part`` fall back to their ``image`` URL/base64 string.
+        """
+        def load(item: MultipartIngestItem) -> Tuple[Optional[Image.Image], Optional[str]]:
+            if item.image_part is None:
+                return self._load_image_safe(item.image), item.image or None
+            if item.image_part >= len(image_parts):
+                raise ValueError(f"image_part {item.image_part} out of range ({len(image_parts)} parts uploaded)")
+            filename, data = image_parts[item.image_part]
+            # upload filenames are client-supplied and may be empty
+            return load_image_from_bytes(data), filename or f"upload:{item.image_part}"
+
+        return self._batch_ingest(items, load)
+
+    def _batch_ingest(
+        self,
+        items: Sequence[BatchIngestItem],
+        load: Callable[[Any], Tuple[Optional[Image.Image], Optional[str]]],
+    ) -> BatchIngestResponse:
+        # `load` returns the decoded image and the reference stored as its image_url
+        if not items:
             return BatchIngestResponse(results=[])
 
         items_to_embed: List[Tuple[Optional[str], Optional[Image.Image]]] = []
@@ -51,24 +83,21 @@ class IngestService:
         results: List[BatchIngestItemResult] = []
         batched_indices: List[int] = []
 
-        for idx, item in enumerate(request.items):
+        for idx, item in enumerate(items):
             results.append(BatchIngestItemResult(index=idx, success=False, message="", ids=None))
-            if not item.text and not item.image:
+            try:
+                image_obj, image_ref = load(item)
+            except Exception as e:
+                results[idx].message = f"Error loading image: {str(e)}"
+                continue
+            if not item.text and not image_ref:
                 results[idx].message = "At least one of 'text' or 'image' must be provided"
                 continue
 
-            image_obj = None
-            if item.image:
-                try:
-                    image_obj = self._load_image_safe(item.image)
-                except Exception as e:
-                    results[idx].message = f"Error loading image: {str(e)}"
-                    continue
-
             batched_indices.append(idx)
             items_to_embed.append((item.text, image_obj))
             texts.append(item.text)
-            image_urls.append(item.image)
+            image_urls.append(image_ref)
             metadatas.append(item.metadata)
 
         if not items_to_embed:
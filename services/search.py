@@ -2,8 +2,11 @@
 
 Provides SearchService which encapsulates query embedding and retrieval logic.
 """
+import heapq
+from collections import defaultdict
 from typing import List, Dict, Any
 from PIL import Image
+from starlette.concurrency import run_in_threadpool
 
 from app.logger import get_logger
 from app.schemas import SearchRequest, SearchResponse, SearchResult
@@ -23,24 +26,30 @@ class SearchService:
         if len(result_lists) == 1:
             return result_lists[0]
 
-        scores_map: Dict[str, List[float]] = {}
+        # id -> [score sum, count]
+        agg: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
         info_map: Dict[str, Dict[str, Any]] = {}
 
         for rl in result_lists:
             for r in rl:
                 rid = r["id"]
-                scores_map.setdefault(rid, []).append(r["similarity_score"])
+                acc = agg[rid]
+                acc[0] += r["similarity_score"]
+                acc[1] += 1
                 if rid not in info_map:
-                    info_map[rid] = {"metadata": r.get("metadata", {}), "document": r.get("document", "")}
+                    info_map[rid] = r
 
-        merged: List[Dict[str, Any]] = []
-        for rid, scores in scores_map.items():
-            avg_score = sum(scores) / len(scores)
-            info = info_map.get(rid, {"metadata": {}, "document": ""})
-            merged.append({"id": rid, "similarity_score": avg_score, "metadata": info["metadata"], "document": info["document"]})
-
-        merged.sort(key=lambda x: x["similarity_score"], reverse=True)
-        return merged[:top_k]
+        # O(N log k) selection instead of sorting every merged id
+        top = heapq.nlargest(top_k, ((rid, total / count) for rid, (total, count) in agg.items()), key=lambda x: x[1])
+        return [
+            {
+                "id": rid,
+                "similarity_score": avg_score,
+                "metadata": info_map[rid].get("metadata", {}),
+                "document": info_map[rid].get("document", ""),
+            }
+            for rid, avg_score in top
+        ]
 
     def search(self, request: SearchRequest) -> SearchResponse:
         """Search using text queries only (request.query_text must be provided)."""
@@ -56,3 +65,18 @@ class SearchService:
         results = self.vector_db.search(query_embedding=image_embedding, top_k=top_k, filter_metadata=filter_metadata)
         # keep behavior consistent with merged multi-modal results: this returns image-only results
         return SearchResponse(results=[SearchResult(**r) for r in results], query_type="image")
+
+    async def search_async(self, request: SearchRequest) -> SearchResponse:
+        """Async variant of `search`; concurrent queries share batched vector DB calls."""
+        if not request.query_text:
+            raise ValueError("`query_text` must be provided for text search")
+        # the CLIP forward pass is blocking; keep it off the event loop
+        text_embedding = await run_in_threadpool(self.embedding_service.embed_text, request.query_text)
+        results = await self.vector_db.search_async(query_embedding=text_embedding, top_k=request.top_k, filter_metadata=request.filter_metadata)
+        return SearchResponse(results=[SearchResult(**r) for r in results], query_type="text")
+
+    async def search_with_image_async(self, image: Image.Image, top_k: int = 10, filter_metadata: Dict[str, Any] = None) -> SearchResponse:
+        """Async variant of `search_with_image`."""
+        image_embedding = await run_in_threadpool(self.embedding_service.embed_image, image)
+        results = await self.vector_db.search_async(query_embedding=image_embedding, top_k=top_k, filter_metadata=filter_metadata)
+        return SearchResponse(results=[SearchResult(**r) for r in results], query_type="image")
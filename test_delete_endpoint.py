@@ -12,6 +12,7 @@ fake_deps = types.SimpleNamespace()
 fake_deps.vector_db = Mock()
 fake_deps.ingest_service = Mock()
 fake_deps.search_service = Mock()
+fake_deps.warmup = Mock()
 sys.modules['app.dependencies'] = fake_deps
 
 from main import delete_items
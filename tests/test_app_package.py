@@ -0,0 +1,35 @@
+import importlib
+import sys
+
+import app
+
+
+def test_import_app_submodule_aliases_top_level_module(tmp_path, monkeypatch):
+    """`import app.<m>` should resolve to the top-level `<m>` without a prior attribute access."""
+    (tmp_path / "alias_mod.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(app, "_PROJECT_ROOT", str(tmp_path))
+    monkeypatch.setattr(app, "_MODULES", app._MODULES + ["alias_mod"])
+    for name in ("alias_mod", "app.alias_mod"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    import app.alias_mod as alias_mod
+    from app.alias_mod import VALUE
+
+    assert VALUE == 42
+    assert alias_mod is sys.modules["alias_mod"]
+    assert app.alias_mod is alias_mod
+    assert sys.modules["app.alias_mod"] is sys.modules["alias_mod"]
+    # the alias must not hijack the real module's spec, or reload() becomes a no-op
+    assert alias_mod.__spec__.name == "alias_mod"
+    (tmp_path / "alias_mod.py").write_text("VALUE = 4300\n")
+    importlib.invalidate_caches()
+    assert importlib.reload(alias_mod).VALUE == 4300
+
+
+def test_app_attribute_resolves_real_submodule():
+    """Names without a top-level module fall back to the regular app/<m>.py submodule."""
+    from app import config
+
+    assert config is sys.modules["app.config"]
+    assert app.config.__file__.endswith("app/config.py")
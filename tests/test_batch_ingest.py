@@ -0,0 +1,56 @@
+import io
+
+from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
+
+from scripts import batch_ingest
+
+
+def _jpeg_image():
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 4), color=(255, 0, 0)).save(buf, format="JPEG")
+    buf.seek(0)
+    return Image.open(buf)
+
+
+def test_build_items_from_columnar_batch(monkeypatch):
+    """A mixed columnar batch maps to items, image parts, text fallbacks and simple metadata."""
+    # start from the exact-type table so the PIL subclass lookup has to fall back
+    monkeypatch.setattr(batch_ingest, "_DISPATCH", {
+        k: v for k, v in batch_ingest._DISPATCH.items()
+        if k in (str, dict, Image.Image, bytes, bytearray)
+    })
+    jpeg = _jpeg_image()
+    assert type(jpeg) is JpegImageFile
+
+    batch = {
+        "id": [1, 2, 3, 4],
+        "productDisplayName": ["Red shirt", None, "", None],
+        "caption": [None, "a caption", None, None],
+        "label": [None, None, "a label", None],
+        "image": [jpeg, {"bytes": b"raw-bytes", "path": None}, "https://example.com/x.jpg", None],
+        "tags": [["a"], ["b"], ["c"], ["d"]],
+    }
+
+    items, images = batch_ingest.build_items_from_examples(batch)
+
+    assert len(items) == 4
+    assert items[0]["text"] == "Red shirt"
+    assert items[0]["image_part"] == 0
+    assert items[1] == {
+        "text": "a caption",
+        "image_part": 1,
+        "metadata": {"id": 2, "productDisplayName": None, "caption": "a caption", "label": None},
+    }
+    assert items[2]["text"] == "a label"
+    assert items[2]["image"] == "https://example.com/x.jpg"
+    assert "image_part" not in items[2]
+    assert items[3] == {"metadata": {"id": 4, "productDisplayName": None, "caption": None, "label": None}}
+    # list-valued columns are not forwarded as metadata
+    assert all("tags" not in item["metadata"] for item in items)
+
+    assert len(images) == 2
+    assert images[0][:2] == b"\xff\xd8"
+    assert images[1] == b"raw-bytes"
+    # the PIL subclass is cached after its first isinstance fallback
+    assert batch_ingest._DISPATCH[JpegImageFile] is batch_ingest._handle_pil
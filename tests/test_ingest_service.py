@@ -1,8 +1,10 @@
+import io
 import pytest
 from unittest.mock import Mock
+from PIL import Image
 
 from services.ingest import IngestService
-from app.schemas import IngestRequest, BatchIngestRequest, BatchIngestItem
+from app.schemas import IngestRequest, BatchIngestRequest, BatchIngestItem, MultipartIngestItem
 
 
 def test_ingest_text_only_success():
@@ -56,3 +58,54 @@ def test_batch_ingest_mixed_items():
 
     embedding.embed_batch.assert_called_once_with([("t1", None)])
     vector_db.add_many.assert_called_once()
+
+
+def test_batch_ingest_multipart_uses_image_parts():
+    """Multipart batch ingest should decode referenced parts and reject out-of-range indices."""
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 4)).save(buf, format="JPEG")
+
+    embedding = Mock()
+    embedding.embed_batch.return_value = [[[0.1], [0.2]]]
+    vector_db = Mock()
+    vector_db.add_many.return_value = [["id1", "id2"]]
+
+    svc = IngestService(embedding, vector_db)
+
+    items = [
+        MultipartIngestItem(text="t1", image_part=0),
+        MultipartIngestItem(text=None, image_part=1),
+    ]
+    res = svc.batch_ingest_multipart(items, [("img0.jpg", buf.getvalue())])
+
+    assert res.results[0].success is True
+    assert res.results[0].ids == ["id1", "id2"]
+    assert res.results[1].success is False
+    assert "out of range" in res.results[1].message
+
+    ((text, image),) = embedding.embed_batch.call_args.args[0]
+    assert text == "t1"
+    assert image.size == (4, 4)
+    assert vector_db.add_many.call_args.kwargs["image_urls"] == ["img0.jpg"]
+
+
+def test_batch_ingest_multipart_names_unnamed_uploads():
+    """Uploads with an empty filename still get a stable image reference."""
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 4)).save(buf, format="JPEG")
+
+    embedding = Mock()
+    embedding.embed_batch.return_value = [[[0.1]]]
+    vector_db = Mock()
+    vector_db.add_many.return_value = [["id1"]]
+
+    svc = IngestService(embedding, vector_db)
+    res = svc.batch_ingest_multipart([MultipartIngestItem(image_part=0)], [("", buf.getvalue())])
+
+    assert res.results[0].success is True
+    assert vector_db.add_many.call_args.kwargs["image_urls"] == ["upload:0"]
+
+
+def test_multipart_item_rejects_image_and_image_part():
+    with pytest.raises(ValueError, match="only one of 'image' or 'image_part'"):
+        MultipartIngestItem(text="t", image="https://example.com/a.jpg", image_part=0)
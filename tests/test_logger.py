@@ -0,0 +1,61 @@
+import json
+import logging
+from unittest.mock import patch
+
+from app.logger import StructuredJsonFormatter, log_event
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(StructuredJsonFormatter())
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def _logger(name, level):
+    logger = logging.getLogger(name)
+    logger.handlers = []
+    handler = _ListHandler()
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger, handler
+
+
+def test_log_event_emits_fields_in_json_payload():
+    logger, handler = _logger("test_log_event", logging.INFO)
+
+    log_event(logger, logging.INFO, "something_happened", count=3, path="/x")
+
+    payload = json.loads(handler.lines[0])
+    assert payload["message"] == "something_happened"
+    assert payload["count"] == 3
+    assert payload["path"] == "/x"
+    assert payload["func"] == "test_log_event_emits_fields_in_json_payload"
+
+
+def test_log_event_skips_disabled_levels():
+    logger, handler = _logger("test_log_event_disabled", logging.INFO)
+
+    with patch.object(logger, "_log") as mock_log:
+        log_event(logger, logging.DEBUG, "noisy_detail", value=1)
+
+    mock_log.assert_not_called()
+    assert handler.lines == []
+
+
+def test_log_event_attaches_traceback_with_exc_info():
+    logger, handler = _logger("test_log_event_exc", logging.INFO)
+
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError as e:
+        log_event(logger, logging.ERROR, "operation_failed", exc_info=True, error=str(e))
+
+    payload = json.loads(handler.lines[0])
+    assert payload["level"] == "ERROR"
+    assert payload["error"] == "boom"
+    assert "RuntimeError: boom" in payload["exc_info"]
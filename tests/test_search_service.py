@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 from PIL import Image
 
 from services.search import SearchService
@@ -51,3 +52,40 @@ def test_image_search_success():
     assert res.results[0].id == "img1"
     embedding.embed_image.assert_called_once()
     vector_db.search.assert_called_once()
+
+
+def test_text_search_async_uses_batched_vector_db():
+    embedding = Mock()
+    embedding.embed_text.return_value = [0.1, 0.2, 0.3]
+    vector_db = Mock()
+    vector_db.search_async = AsyncMock(return_value=[
+        {"id": "doc1", "similarity_score": 0.9, "metadata": {}, "document": "doc1 text"}
+    ])
+
+    svc = SearchService(embedding, vector_db)
+    req = SearchRequest(query_text="find me", query_image=None, top_k=5, filter_metadata={"a": 1})
+
+    res = asyncio.run(svc.search_async(req))
+
+    assert res.query_type == "text"
+    assert res.results[0].id == "doc1"
+    vector_db.search_async.assert_awaited_once_with(query_embedding=[0.1, 0.2, 0.3], top_k=5, filter_metadata={"a": 1})
+    vector_db.search.assert_not_called()
+
+
+def test_merge_results_averages_scores_and_keeps_top_k():
+    svc = SearchService(Mock(), Mock())
+    text_results = [
+        {"id": "a", "similarity_score": 0.9, "metadata": {"m": 1}, "document": "A"},
+        {"id": "b", "similarity_score": 0.5, "metadata": {}, "document": "B"},
+    ]
+    image_results = [
+        {"id": "b", "similarity_score": 0.9, "metadata": {}, "document": "B"},
+        {"id": "c", "similarity_score": 0.8, "metadata": {}, "document": "C"},
+    ]
+
+    merged = svc._merge_results([text_results, image_results], top_k=2)
+
+    assert [r["id"] for r in merged] == ["a", "c"]
+    assert merged[0] == {"id": "a", "similarity_score": 0.9, "metadata": {"m": 1}, "document": "A"}
+    assert svc._merge_results([text_results, image_results], top_k=3)[2]["similarity_score"] == pytest.approx(0.7)
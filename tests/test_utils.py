@@ -0,0 +1,80 @@
+import base64
+import io
+from unittest.mock import Mock, patch
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from app import utils
+
+
+def _png_bytes():
+    buf = io.BytesIO()
+    Image.new("RGB", (2, 2), color=(0, 255, 0)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _response(status_code=200, content=b"", etag=None):
+    resp = Mock()
+    resp.status_code = status_code
+    resp.content = content
+    resp.headers = {"ETag": etag} if etag else {}
+    return resp
+
+
+def setup_function():
+    utils._image_cache.clear()
+    utils._image_cache_bytes = 0
+
+
+def test_load_image_from_url_uses_cache_for_repeated_urls():
+    with patch("app.utils._session.get", return_value=_response(content=_png_bytes())) as mock_get:
+        first = utils.load_image("https://example.com/a.png")
+        second = utils.load_image("https://example.com/a.png")
+
+    assert first.size == second.size == (2, 2)
+    assert first is not second
+    mock_get.assert_called_once()
+
+
+def test_stale_entry_is_revalidated_with_etag():
+    with patch("app.utils._session.get", return_value=_response(content=_png_bytes(), etag='"v1"')):
+        utils.load_image("https://example.com/a.png")
+
+    with patch("app.utils.IMAGE_CACHE_TTL_SECONDS", 0), \
+            patch("app.utils._session.get", return_value=_response(status_code=304)) as mock_get:
+        img = utils.load_image("https://example.com/a.png")
+
+    assert img.size == (2, 2)
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+
+def test_non_image_and_oversized_bodies_are_not_cached():
+    with patch("app.utils._session.get", return_value=_response(content=b"<html>not an image</html>")):
+        with pytest.raises(UnidentifiedImageError):
+            utils.load_image("https://example.com/page")
+
+    with patch("app.utils.IMAGE_CACHE_MAX_ITEM_BYTES", 10), \
+            patch("app.utils._session.get", return_value=_response(content=_png_bytes())):
+        utils.load_image("https://example.com/big.png")
+
+    assert not utils._image_cache
+    assert utils._image_cache_bytes == 0
+
+
+def test_cache_evicts_oldest_entries_over_byte_budget():
+    body = _png_bytes()
+    with patch("app.utils.IMAGE_CACHE_MAX_BYTES", 2 * len(body)), \
+            patch("app.utils._session.get", return_value=_response(content=body)):
+        for name in ("a", "b", "c"):
+            utils.load_image(f"https://example.com/{name}.png")
+
+    assert list(utils._image_cache) == ["https://example.com/b.png", "https://example.com/c.png"]
+    assert utils._image_cache_bytes == 2 * len(body)
+
+
+def test_load_image_from_base64_with_and_without_data_uri_prefix():
+    encoded = base64.b64encode(_png_bytes()).decode()
+
+    assert utils.load_image(encoded).size == (2, 2)
+    assert utils.load_image("data:image/png;base64," + encoded).size == (2, 2)
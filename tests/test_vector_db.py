@@ -0,0 +1,165 @@
+import asyncio
+import threading
+
+import pytest
+
+from app import vector_db as vector_db_module
+from app.logger import get_request_id, set_request_id
+from app.vector_db import VectorDB
+
+
+class StubCollection:
+    """Minimal stand-in for a Chroma collection that records query calls."""
+
+    def __init__(self):
+        self.queries = []
+        self.request_ids = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.error = None
+
+    def add(self, **kwargs):
+        pass
+
+    def delete(self, **kwargs):
+        pass
+
+    def query(self, query_embeddings, n_results, where=None):
+        self.queries.append((query_embeddings, n_results, where))
+        self.request_ids.append(get_request_id())
+        self.gate.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        ids = [[f"{emb[0]:g}-{j}" for j in range(n_results)] for emb in query_embeddings]
+        return {
+            "ids": ids,
+            "distances": [[0.1 * j for j in range(n_results)] for _ in query_embeddings],
+            "metadatas": [[{} for _ in range(n_results)] for _ in query_embeddings],
+            "documents": [["" for _ in range(n_results)] for _ in query_embeddings],
+        }
+
+
+class StubClient:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_or_create_collection(self, name, metadata=None):
+        return self.collection
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    coll = StubCollection()
+    monkeypatch.setattr(vector_db_module.chromadb, "PersistentClient", lambda path, settings: StubClient(coll))
+    return coll
+
+
+async def _wait_for_queries(collection, n):
+    while len(collection.queries) < n:
+        await asyncio.sleep(0.001)
+
+
+def test_search_async_idle_query_bypasses_batching(collection):
+    db = VectorDB(persist_directory="unused")
+
+    rows = asyncio.run(db.search_async([1.0], top_k=2))
+
+    assert [r["id"] for r in rows] == ["1-0", "1-1"]
+    assert collection.queries == [([[1.0]], 2, None)]
+    assert db._inflight == 0
+
+
+def test_search_async_coalesces_per_filter_and_slices_top_k(collection):
+    db = VectorDB(persist_directory="unused")
+
+    async def run():
+        collection.gate.clear()
+        first = asyncio.ensure_future(db.search_async([1.0], top_k=1))
+        await _wait_for_queries(collection, 1)
+        # the first query is in flight, so these queue up by filter
+        queued = [
+            asyncio.ensure_future(db.search_async([2.0], top_k=1, filter_metadata={"c": "a"})),
+            asyncio.ensure_future(db.search_async([3.0], top_k=3, filter_metadata={"c": "a"})),
+            asyncio.ensure_future(db.search_async([4.0], top_k=2, filter_metadata={"c": "b"})),
+        ]
+        await asyncio.sleep(0)
+        collection.gate.set()
+        return await first, await asyncio.gather(*queued)
+
+    first, (a1, a3, b2) = asyncio.run(run())
+
+    assert [r["id"] for r in first] == ["1-0"]
+    assert [r["id"] for r in a1] == ["2-0"]
+    assert [r["id"] for r in a3] == ["3-0", "3-1", "3-2"]
+    assert [r["id"] for r in b2] == ["4-0", "4-1"]
+    batched = sorted(collection.queries[1:], key=lambda q: q[2]["c"])
+    assert batched == [([[2.0], [3.0]], 3, {"c": "a"}), ([[4.0]], 2, {"c": "b"})]
+    assert db._pending == {}
+    assert not db._flush_tasks
+
+
+def test_search_async_flushes_full_batch_before_window(collection):
+    db = VectorDB(persist_directory="unused")
+    db._batch_window = 30.0
+    db._batch_max_size = 2
+
+    async def run():
+        collection.gate.clear()
+        first = asyncio.ensure_future(db.search_async([1.0], top_k=1))
+        await _wait_for_queries(collection, 1)
+        queued = [asyncio.ensure_future(db.search_async([float(i)], top_k=1)) for i in (2, 3)]
+        await asyncio.sleep(0)
+        collection.gate.set()
+        await first
+        # the window is 30s; completing well before it means the full batch flushed early
+        return await asyncio.wait_for(asyncio.gather(*queued), timeout=2)
+
+    results = asyncio.run(run())
+
+    assert [rows[0]["id"] for rows in results] == ["2-0", "3-0"]
+    assert collection.queries[1] == ([[2.0], [3.0]], 1, None)
+
+
+def test_search_async_propagates_batch_errors_to_every_query(collection):
+    db = VectorDB(persist_directory="unused")
+
+    async def run():
+        collection.gate.clear()
+        first = asyncio.ensure_future(db.search_async([1.0], top_k=1))
+        await _wait_for_queries(collection, 1)
+        queued = [asyncio.ensure_future(db.search_async([float(i)], top_k=1)) for i in (2, 3)]
+        await asyncio.sleep(0)
+        collection.error = RuntimeError("chroma down")
+        collection.gate.set()
+        return await asyncio.gather(first, *queued, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert db._inflight == 0
+
+
+def test_search_async_request_ids_reach_idle_queries_and_batch_logs(collection, monkeypatch):
+    db = VectorDB(persist_directory="unused")
+    events = []
+    monkeypatch.setattr(vector_db_module, "log_event", lambda logger, level, event, **fields: events.append((event, fields)))
+
+    async def query(rid, value):
+        set_request_id(rid)
+        return await db.search_async([value], top_k=1)
+
+    async def run():
+        collection.gate.clear()
+        first = asyncio.ensure_future(query("rid-1", 1.0))
+        await _wait_for_queries(collection, 1)
+        queued = [asyncio.ensure_future(query(rid, v)) for rid, v in (("rid-2", 2.0), ("rid-3", 3.0))]
+        await asyncio.sleep(0)
+        collection.gate.set()
+        await asyncio.gather(first, *queued)
+
+    asyncio.run(run())
+
+    # the idle query runs in the caller's context; the shared batch runs in none
+    assert collection.request_ids == ["rid-1", None]
+    flushed = [fields for event, fields in events if event == "search_batch_flushed"]
+    assert flushed == [{"size": 2, "request_ids": ["rid-2", "rid-3"]}]